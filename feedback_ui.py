@@ -3,25 +3,257 @@
 # Inspired by/related to dotcursorrules.com (https://dotcursorrules.com/)
 import os
 import sys
+import atexit
 import json
 import argparse
-import hashlib
+import functools
+import itertools
 import tempfile
 import time
 import re
-from typing import Optional, TypedDict, List, Tuple
+import stat
+import weakref
+from typing import Optional, TypedDict, List, Tuple, Dict
 
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QPushButton, QTextEdit, QGroupBox, QSizePolicy, QFileDialog
 )
-from PySide6.QtCore import Qt, Signal, QObject, QTimer, QSettings
+from PySide6.QtCore import Qt, Signal, QObject, QTimer, QSettings, QRunnable, QThreadPool, QEvent
 from PySide6.QtGui import (
-    QIcon, QKeyEvent, QPalette, QColor,
-    QPixmap, QImage, QDragEnterEvent, QDropEvent
+    QIcon, QKeySequence, QShortcut, QPalette, QColor, QFont, QFontMetrics,
+    QPixmap, QImage, QImageReader, QDragEnterEvent, QDropEvent
 )
 
 
+# 支持的图片扩展名
+_IMAGE_EXTS = frozenset({'.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp'})
+
+
+# 文件引用语法：@路径 / @路径#行号 / @路径#起始行-结束行（支持 / 和 \ 分隔符）
+_FILE_REF_RE = re.compile(r'@([\w./\\][\w./\\-]*(?:\.\w+))(?:#(\d+)(?:-(\d+))?)?')
+
+# 临时 PNG 的保存质量：Qt 按 (100 - quality) * 9 / 91 换算 zlib 压缩级别，80 对应级别 1
+_TEMP_PNG_QUALITY = 80
+# 无透明通道的临时图片保存为 JPG
+_TEMP_JPG_QUALITY = 85
+# 临时图片最长边上限（像素），超出时先缩小再保存
+_TEMP_IMAGE_MAX_DIM = 1920
+
+# 全局样式表（模块级常量，导入时只构建一次）
+_GLOBAL_QSS = """
+    /* 主按钮样式 */
+    QPushButton {
+        background-color: #3d3d3d;
+        border: 1px solid #555;
+        border-radius: 6px;
+        padding: 8px 16px;
+        color: #fff;
+        font-size: 13px;
+        min-height: 20px;
+    }
+    QPushButton:hover {
+        background-color: #4a4a4a;
+        border-color: #666;
+    }
+    QPushButton:pressed {
+        background-color: #2d2d2d;
+    }
+
+    /* 主要操作按钮 */
+    QPushButton#primaryButton {
+        background-color: #2a82da;
+        border: 1px solid #3a92ea;
+    }
+    QPushButton#primaryButton:hover {
+        background-color: #3a92ea;
+    }
+
+    /* 分组框样式 */
+    QGroupBox {
+        font-size: 14px;
+        font-weight: bold;
+        border: 1px solid #555;
+        border-radius: 8px;
+        margin-top: 12px;
+        padding-top: 12px;
+        background-color: #323232;
+    }
+    QGroupBox::title {
+        subcontrol-origin: margin;
+        left: 12px;
+        padding: 0 8px;
+        color: #aaa;
+    }
+
+    /* 文本编辑器样式 */
+    QTextEdit {
+        background-color: #2a2a2a;
+        border: 1px solid #555;
+        border-radius: 6px;
+        padding: 8px;
+        color: #fff;
+        font-size: 13px;
+    }
+    QTextEdit:focus {
+        border-color: #2a82da;
+    }
+
+    /* 标签样式 */
+    QLabel {
+        color: #ddd;
+        font-size: 13px;
+    }
+    QLabel#descriptionLabel {
+        font-size: 14px;
+        color: #fff;
+        padding: 8px;
+        background-color: #3a4a5a;
+        border-radius: 6px;
+        border-left: 4px solid #2a82da;
+    }
+    QLabel#projectLabel {
+        font-size: 14px;
+        font-weight: bold;
+        color: #4a9eff;
+        padding: 4px 10px;
+        background-color: #2a3a4a;
+        border-radius: 4px;
+    }
+    QLabel#referencePreview {
+        font-size: 11px;
+        color: #888;
+        padding: 4px 8px;
+        background-color: #2a2a2a;
+        border-radius: 4px;
+        border-left: 3px solid #4a9eff;
+    }
+    QLabel#imageInfoLabel {
+        font-size: 12px;
+        color: #888;
+    }
+    QLabel#imageInfoLabel[active="true"] {
+        color: #4a9eff;
+    }
+    QLabel#imageHintLabel {
+        font-size: 11px;
+        color: #666;
+        padding: 2px 0;
+    }
+    QLabel#contactLabel {
+        font-size: 10px;
+        color: #666;
+        padding: 8px;
+    }
+
+    /* 超时倒计时标签（通过 state 动态属性切换） */
+    QLabel#timeoutLabel {
+        font-size: 12px;
+        color: #aaa;
+        padding: 4px 8px;
+        background-color: #333;
+        border-radius: 4px;
+    }
+    QLabel#timeoutLabel[state="warning"] {
+        color: #ffaa66;
+        background-color: #4a3a2a;
+    }
+    QLabel#timeoutLabel[state="danger"] {
+        color: #ff6666;
+        background-color: #4a2a2a;
+        font-weight: bold;
+    }
+    QLabel#timeoutLabel[state="paused"] {
+        color: #ffc;
+        background-color: #5a4a3a;
+    }
+
+    /* 重新计时按钮（绿色） */
+    QPushButton#resetTimerButton {
+        font-size: 11px;
+        padding: 4px 8px;
+        background-color: #3a5a3a;
+        border: 1px solid #4a6a4a;
+        border-radius: 4px;
+        color: #cfc;
+    }
+    QPushButton#resetTimerButton:hover {
+        background-color: #4a6a4a;
+    }
+
+    /* 停止计时按钮（橙色） */
+    QPushButton#stopTimerButton {
+        font-size: 11px;
+        padding: 4px 8px;
+        background-color: #5a4a3a;
+        border: 1px solid #6a5a4a;
+        border-radius: 4px;
+        color: #ffc;
+    }
+    QPushButton#stopTimerButton:hover {
+        background-color: #6a5a4a;
+    }
+    /* 暂停后切换为“恢复”按钮（绿色，与重新计时按钮一致） */
+    QPushButton#stopTimerButton[mode="paused"] {
+        background-color: #3a5a3a;
+        border: 1px solid #4a6a4a;
+        color: #cfc;
+    }
+    QPushButton#stopTimerButton[mode="paused"]:hover {
+        background-color: #4a6a4a;
+    }
+
+    /* 图片操作按钮 */
+    QPushButton#selectImageButton {
+        font-size: 11px;
+        padding: 2px 10px;
+    }
+    QPushButton#clearImageButton {
+        font-size: 11px;
+        padding: 2px;
+        background-color: #5a3a3a;
+        border: 1px solid #6a4a4a;
+    }
+    QPushButton#clearImageButton:hover {
+        background-color: #6a4a4a;
+    }
+
+    /* 选项按钮（未选中） */
+    QPushButton#optionButton {
+        text-align: left;
+        padding: 8px 14px;
+        background-color: #2a4a3a;
+        border: 1px solid #3a6a4a;
+        border-radius: 8px;
+        color: #9fc;
+        font-size: 13px;
+    }
+    QPushButton#optionButton:hover {
+        background-color: #3a5a4a;
+        border-color: #4a7a5a;
+        color: #bfe;
+    }
+    QPushButton#optionButton:pressed {
+        background-color: #1a3a2a;
+    }
+
+    /* 选项按钮（已选中，通过 selected 动态属性切换） */
+    QPushButton#optionButton[selected="true"] {
+        background-color: #1a5a3a;
+        border: 2px solid #4aaa6a;
+        color: #bfe;
+        font-weight: bold;
+    }
+    QPushButton#optionButton[selected="true"]:hover {
+        background-color: #2a6a4a;
+        border-color: #5aba7a;
+    }
+    QPushButton#optionButton[selected="true"]:pressed {
+        background-color: #0a4a2a;
+    }
+"""
+
+
 class FeedbackResult(TypedDict):
     logs: str
     interactive_feedback: str
@@ -45,16 +277,55 @@ def parse_file_references(text: str, project_directory: str) -> List[Tuple[str,
 
     返回: [(文件路径, 起始行, 结束行), ...]
     """
-    # 匹配 @路径 或 @路径#行号 或 @路径#起始行-结束行
-    # 支持完整相对路径，包含 / 和 \ 分隔符
-    pattern = r'@([\w./\\][\w./\\-]*(?:\.\w+))(?:#(\d+)(?:-(\d+))?)?'
-    matches = re.finditer(pattern, text)
-
+    # 没有 @ 就不可能有引用，跳过正则和缓存
+    if '@' not in text:
+        return []
+    # 解析结果可缓存，文件存在性会变化，每次都重新检查（由 _exists_cached 的 TTL 控制开销）
+    return [
+        reference for reference in _parse_file_references_cached(text, project_directory)
+        if _exists_cached(reference[0])
+    ]
+
+
+# 显示用路径统一为正斜杠：os.path 产生的路径只在 Windows 上可能含反斜杠
+if os.sep == '/':
+    def _to_posix(path: str) -> str:
+        return path
+else:
+    def _to_posix(path: str) -> str:
+        return path.replace('\\', '/')
+
+
+# 引用文件存在性缓存：{路径: (检查时间, 是否存在)}
+_exists_cache: Dict[str, Tuple[float, bool]] = {}
+_EXISTS_CACHE_MAX = 512
+
+
+def _exists_cached(path: str, ttl: float = 2.0) -> bool:
+    """带 TTL 的 os.path.exists，避免每次按键都对同一路径 stat"""
+    now = time.monotonic()
+    cached = _exists_cache.get(path)
+    if cached is not None and now - cached[0] < ttl:
+        return cached[1]
+    if len(_exists_cache) >= _EXISTS_CACHE_MAX:
+        _exists_cache.clear()
+    exists = os.path.exists(path)
+    _exists_cache[path] = (now, exists)
+    return exists
+
+
+@functools.lru_cache(maxsize=64)
+def _parse_file_references_cached(text: str, project_directory: str) -> Tuple[Tuple[str, Optional[int], Optional[int]], ...]:
+    """parse_file_references 的纯解析部分（正则、路径标准化、去重），相同文本直接复用结果
+
+    不检查文件是否存在，结果只取决于参数，可以安全缓存（返回可哈希的元组）。
+    """
     references = []
-    for match in matches:
-        filename = match.group(1)
-        start_line = int(match.group(2)) if match.group(2) else None
-        end_line = int(match.group(3)) if match.group(3) else start_line
+    seen = set()  # 同一引用重复出现时只保留第一次
+    for match in _FILE_REF_RE.finditer(text):
+        filename, start, end = match.groups()
+        start_line = int(start) if start else None
+        end_line = int(end) if end else start_line
 
         # 统一路径分隔符
         filename = filename.replace('\\', '/')
@@ -68,10 +339,13 @@ def parse_file_references(text: str, project_directory: str) -> List[Tuple[str,
         # 标准化路径
         file_path = os.path.normpath(file_path)
 
-        if os.path.exists(file_path):
-            references.append((file_path, start_line, end_line))
+        reference = (file_path, start_line, end_line)
+        if reference in seen:
+            continue
+        seen.add(reference)
+        references.append(reference)
 
-    return references
+    return tuple(references)
 
 
 def expand_file_references(text: str, project_directory: str) -> str:
@@ -80,12 +354,12 @@ def expand_file_references(text: str, project_directory: str) -> str:
     if not references:
         return text
 
-    expanded_text = text
+    parts = [text]
 
     for file_path, start_line, end_line in references:
         # 计算相对路径用于显示
         try:
-            rel_path = os.path.relpath(file_path, project_directory).replace('\\', '/')
+            rel_path = _to_posix(os.path.relpath(file_path, project_directory))
         except ValueError:
             rel_path = file_path
 
@@ -97,19 +371,71 @@ def expand_file_references(text: str, project_directory: str) -> str:
             ref_info = f"\n\n[引用: {rel_path}#{start_line}-{end_line}]"
 
         # 在文本末尾追加引用信息（不替换原始文本）
-        expanded_text += ref_info
+        parts.append(ref_info)
+
+    return ''.join(parts)
+
+
+def _sweep_temp_images(keep_paths: frozenset = frozenset()) -> None:
+    """扫描系统临时目录，清除所有 mcp_feedback_ 临时图片（包括历史会话遗留的）"""
+    # scandir 直接给出完整路径和类型信息，避免逐个 join 和额外的 stat
+    try:
+        with os.scandir(tempfile.gettempdir()) as entries:
+            for entry in entries:
+                name = entry.name
+                if not (name.startswith("mcp_feedback_") and name.endswith((".png", ".jpg"))):
+                    continue
+                if entry.path in keep_paths or not entry.is_file(follow_symlinks=False):
+                    continue
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+    except OSError:
+        pass
 
-    return expanded_text
 
+def _remove_temp_images(paths: set, keep_paths: frozenset = frozenset()) -> None:
+    """删除集合中的临时图片（跳过 keep_paths），已删除或已不存在的路径从集合中移除"""
+    removed = set()
+    for path in paths - keep_paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            continue
+        removed.add(path)
+    paths.difference_update(removed)
+
+
+# 历史图片扫描是否已登记到进程退出时执行
+_orphan_sweep_registered = False
+
+
+def _schedule_orphan_sweep() -> None:
+    """登记在进程退出时扫描一次临时目录，多次调用只登记一次"""
+    global _orphan_sweep_registered
+    if not _orphan_sweep_registered:
+        atexit.register(_sweep_temp_images)
+        _orphan_sweep_registered = True
 
-def set_dark_title_bar(widget: QWidget, dark_title_bar: bool) -> None:
-    if sys.platform != "win32":
-        return
 
+# 深色标题栏所需的 DWM 接口，导入时解析一次（Windows 10 1809 / build 17763 起支持）
+if sys.platform == "win32":
     from ctypes import windll, c_uint32, byref
 
-    build_number = sys.getwindowsversion().build
-    if build_number < 17763:
+    _WIN_BUILD = sys.getwindowsversion().build
+    _DWM_ATTR = 20 if _WIN_BUILD >= 18985 else 19
+    _dwmapi = windll.dwmapi if _WIN_BUILD >= 17763 else None
+    # SWP_NOSIZE | SWP_NOMOVE | SWP_NOZORDER | SWP_FRAMECHANGED
+    _SWP_FRAME_CHANGED_FLAGS = 0x0001 | 0x0002 | 0x0004 | 0x0020
+else:
+    _dwmapi = None
+
+
+def set_dark_title_bar(widget: QWidget, dark_title_bar: bool) -> None:
+    if _dwmapi is None:
         return
 
     dark_prop = widget.property("DarkTitleBar")
@@ -118,20 +444,34 @@ def set_dark_title_bar(widget: QWidget, dark_title_bar: bool) -> None:
 
     widget.setProperty("DarkTitleBar", dark_title_bar)
 
-    dwmapi = windll.dwmapi
     hwnd = widget.winId()
-    attribute = 20 if build_number >= 18985 else 19
     c_dark_title_bar = c_uint32(dark_title_bar)
-    dwmapi.DwmSetWindowAttribute(hwnd, attribute, byref(c_dark_title_bar), 4)
+    _dwmapi.DwmSetWindowAttribute(hwnd, _DWM_ATTR, byref(c_dark_title_bar), 4)
+
+    # 窗口已显示时才需通知非客户区变化以重绘标题栏；尚未显示时首次绘制即会生效
+    if widget.isVisible():
+        windll.user32.SetWindowPos(hwnd, 0, 0, 0, 0, 0, _SWP_FRAME_CHANGED_FLAGS)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_app_icon() -> QIcon:
+    """窗口图标（每个进程只加载一次）"""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    return QIcon(os.path.join(script_dir, "images", "feedback.png"))
 
-    temp_widget = QWidget(None, Qt.FramelessWindowHint)
-    temp_widget.resize(1, 1)
-    temp_widget.move(widget.pos())
-    temp_widget.show()
-    temp_widget.deleteLater()
+
+# 深色调色板只构建一次，之后返回共享数据的副本（QPalette 隐式共享，复制很廉价）
+_dark_palette: Optional[QPalette] = None
 
 
 def get_dark_mode_palette(app: QApplication):
+    global _dark_palette
+    if _dark_palette is None:
+        _dark_palette = _build_dark_mode_palette(app)
+    return QPalette(_dark_palette)
+
+
+def _build_dark_mode_palette(app: QApplication) -> QPalette:
     darkPalette = app.palette()
     darkPalette.setColor(QPalette.Window, QColor(53, 53, 53))
     darkPalette.setColor(QPalette.WindowText, Qt.white)
@@ -157,49 +497,125 @@ def get_dark_mode_palette(app: QApplication):
     return darkPalette
 
 
+class _ImageProbeSignals(QObject):
+    """图片校验任务的信号容器（QRunnable 本身不是 QObject）"""
+    probed = Signal(str, bool)
+
+
+class _ImageProbeTask(QRunnable):
+    """在线程池中批量校验图片文件，避免阻塞 GUI 线程
+
+    按路径引用的图片由下游直接读取文件，这里只需 QImageReader 读取文件头确认可解码，
+    无需完整解码。结果通过信号逐个回到主线程处理。
+    """
+
+    def __init__(self, file_paths: List[str]):
+        super().__init__()
+        self.file_paths = file_paths
+        self.signals = _ImageProbeSignals()
+
+    def run(self):
+        for file_path in self.file_paths:
+            self.signals.probed.emit(file_path, QImageReader(file_path).canRead())
+
+
+class _ImageSaveSignals(QObject):
+    """图片保存任务的信号容器"""
+    saved = Signal(str, bool)
+
+
+class _ImageSaveTask(QRunnable):
+    """在线程池中缩放并编码临时图片（QPixmap 仅限 GUI 线程，跨线程传递 QImage）"""
+
+    def __init__(self, image: QImage, file_path: str, fmt: str, quality: int):
+        super().__init__()
+        self.image = image
+        self.file_path = file_path
+        self.fmt = fmt
+        self.quality = quality
+        self.signals = _ImageSaveSignals()
+
+    def run(self):
+        image = self.image
+        if max(image.width(), image.height()) > _TEMP_IMAGE_MAX_DIM:
+            image = image.scaled(
+                _TEMP_IMAGE_MAX_DIM, _TEMP_IMAGE_MAX_DIM,
+                Qt.KeepAspectRatio, Qt.SmoothTransformation
+            )
+        ok = image.save(self.file_path, self.fmt, self.quality)
+        if not ok:
+            # 编码中途失败（磁盘已满等）会留下截断的文件，删除后文件存在即代表写入成功
+            try:
+                os.remove(self.file_path)
+            except OSError:
+                pass
+        self.signals.saved.emit(self.file_path, ok)
+
+
+def _local_image_files(urls) -> List[str]:
+    """从拖放/粘贴的 URL 中取出本地图片文件路径
+
+    只看扩展名，不在 GUI 线程 stat；文件是否存在/可读由后台校验任务判断。
+    """
+    splitext = os.path.splitext
+    image_files = []
+    for url in urls:
+        if not url.isLocalFile():
+            continue
+        file_path = url.toLocalFile()
+        if splitext(file_path)[1].lower() in _IMAGE_EXTS:
+            image_files.append(file_path)
+    return image_files
+
+
+def _image_from_mime_data(image_data) -> QImage:
+    """把 mimeData().imageData() 统一为 QImage
+
+    剪贴板图片通常本身就是 QImage，直接使用，不再经 QPixmap 转换一轮：
+    全分辨率截图只在后台保存时缩放一次，GUI 线程不持有全尺寸 QPixmap。
+    """
+    if isinstance(image_data, QImage):
+        return image_data
+    if isinstance(image_data, QPixmap):
+        return image_data.toImage()
+    return QImage()
+
+
 class FeedbackTextEdit(QTextEdit):
     """自定义文本编辑器，支持纯文本粘贴和图片粘贴"""
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, feedback_ui: Optional["FeedbackUI"] = None):
         super().__init__(parent)
+        self._feedback_ui = feedback_ui
         self.setAcceptRichText(False)
         self.setAcceptDrops(True)
 
     def _get_feedback_ui(self):
-        """查找父级 FeedbackUI 实例"""
-        parent = self.parent()
-        while parent and not isinstance(parent, FeedbackUI):
-            parent = parent.parent()
-        return parent
+        """查找父级 FeedbackUI 实例（首次查找后缓存）"""
+        if self._feedback_ui is None:
+            parent = self.parent()
+            while parent and not isinstance(parent, FeedbackUI):
+                parent = parent.parent()
+            self._feedback_ui = parent
+        return self._feedback_ui
 
     def insertFromMimeData(self, source):
         """重写粘贴方法：支持图片粘贴和纯文本"""
+        has_image = source.hasImage()
+        has_urls = source.hasUrls()
+        ui = self._get_feedback_ui() if (has_image or has_urls) else None
         # 优先处理图片数据（剪贴板截图）
-        if source.hasImage():
-            ui = self._get_feedback_ui()
+        if has_image:
             if ui:
-                image_data = source.imageData()
-                if isinstance(image_data, QImage):
-                    pixmap = QPixmap.fromImage(image_data)
-                elif isinstance(image_data, QPixmap):
-                    pixmap = image_data
-                else:
-                    pixmap = QPixmap()
-                if not pixmap.isNull():
-                    ui._add_image_from_pixmap(pixmap, "剪贴板截图")
+                image = _image_from_mime_data(source.imageData())
+                if not image.isNull():
+                    ui._add_image_from_qimage(image)
                     return
         # 处理文件URL（拖放图片文件）
-        if source.hasUrls():
-            ui = self._get_feedback_ui()
+        if has_urls:
             if ui:
-                for url in source.urls():
-                    file_path = url.toLocalFile()
-                    if file_path:
-                        ext = os.path.splitext(file_path)[1].lower()
-                        if ext in ['.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp']:
-                            pixmap = QPixmap(file_path)
-                            if not pixmap.isNull():
-                                ui._add_image_from_pixmap(pixmap, file_path)
+                image_files = _local_image_files(source.urls())
+                ui._load_image_files(image_files)
                 return
         # 纯文本粘贴
         if source.hasText():
@@ -209,7 +625,8 @@ class FeedbackTextEdit(QTextEdit):
 
     def dragEnterEvent(self, event: QDragEnterEvent):
         """拖拽进入：接受图片文件"""
-        if event.mimeData().hasImage() or event.mimeData().hasUrls():
+        mime = event.mimeData()
+        if mime.hasImage() or mime.hasUrls():
             event.acceptProposedAction()
         else:
             super().dragEnterEvent(event)
@@ -220,105 +637,75 @@ class FeedbackTextEdit(QTextEdit):
         ui = self._get_feedback_ui()
         if ui:
             if mime.hasImage():
-                image_data = mime.imageData()
-                if isinstance(image_data, QImage):
-                    pixmap = QPixmap.fromImage(image_data)
-                elif isinstance(image_data, QPixmap):
-                    pixmap = image_data
-                else:
-                    pixmap = QPixmap()
-                if not pixmap.isNull():
-                    ui._add_image_from_pixmap(pixmap, "拖放的图片")
+                image = _image_from_mime_data(mime.imageData())
+                if not image.isNull():
+                    ui._add_image_from_qimage(image)
                     event.acceptProposedAction()
                     return
             if mime.hasUrls():
-                handled = False
-                for url in mime.urls():
-                    file_path = url.toLocalFile()
-                    if file_path:
-                        ext = os.path.splitext(file_path)[1].lower()
-                        if ext in ['.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp']:
-                            pixmap = QPixmap(file_path)
-                            if not pixmap.isNull():
-                                ui._add_image_from_pixmap(pixmap, file_path)
-                                handled = True
-                if handled:
+                image_files = _local_image_files(mime.urls())
+                if image_files:
+                    ui._load_image_files(image_files)
                     event.acceptProposedAction()
                     return
         super().dropEvent(event)
 
-    def keyPressEvent(self, event: QKeyEvent):
-        if event.key() == Qt.Key_Return and event.modifiers() == Qt.ControlModifier:
-            ui = self._get_feedback_ui()
-            if ui:
-                ui._submit_feedback()
-        else:
-            super().keyPressEvent(event)
-
 
 class FeedbackUI(QMainWindow):
-    # 预定义超时样式，避免重复创建
-    _TIMEOUT_STYLE_NORMAL = """
-        font-size: 12px;
-        color: #aaa;
-        padding: 4px 8px;
-        background-color: #333;
-        border-radius: 4px;
-    """
-    _TIMEOUT_STYLE_WARNING = """
-        font-size: 12px;
-        color: #ffaa66;
-        padding: 4px 8px;
-        background-color: #4a3a2a;
-        border-radius: 4px;
-    """
-    _TIMEOUT_STYLE_DANGER = """
-        font-size: 12px;
-        color: #ff6666;
-        padding: 4px 8px;
-        background-color: #4a2a2a;
-        border-radius: 4px;
-        font-weight: bold;
-    """
-    _TIMEOUT_STYLE_PAUSED = """
-        font-size: 12px;
-        color: #ffc;
-        padding: 4px 8px;
-        background-color: #5a4a3a;
-        border-radius: 4px;
-    """
-
     def __init__(self, project_directory: str, prompt: str, current_file: Optional[str] = None, timeout_seconds: int = 600, options: Optional[List[str]] = None):
         super().__init__()
         self.project_directory = project_directory
         self.prompt = prompt
         self.current_file = current_file
         self.timeout_seconds = timeout_seconds
-        self.start_time = time.time()
+        self.start_time = time.monotonic()
         self.timeout_triggered = False
         self.options = options or []
         self.selected_options: List[str] = []  # 已选中的选项
         self.image_paths: List[str] = []  # 图片路径列表
-        self.temp_image_counter = 0  # 临时图片计数器
+        self._image_display_names: List[str] = []  # 与 image_paths 对应的显示名称
+        self._image_paths_set = set()  # image_paths 的成员索引，用于 O(1) 去重
+        self._temp_image_counter = itertools.count(1)  # 临时图片计数器
+        self._pending_image_saves = set()  # 正在后台写入的临时图片路径
+        self._pending_image_probes: Dict[str, None] = {}  # 正在后台校验的图片路径（保持加入顺序）
+        self._owned_temp_images = set()  # 本会话创建的临时图片，清理时只处理这些文件
+        # 窗口销毁或进程退出时删除本会话未提交出去的临时图片
+        weakref.finalize(self, _remove_temp_images, self._owned_temp_images)
+
+        # 图片状态刷新合并器：连续添加多张图片时只在下一帧刷新一次
+        self._image_display_timer = QTimer(self)
+        self._image_display_timer.setSingleShot(True)
+        self._image_display_timer.setInterval(16)
+        self._image_display_timer.timeout.connect(self._do_update_image_display, Qt.DirectConnection)
 
         self.feedback_result = None
 
         # 超时样式状态缓存，避免重复设置样式
         self._current_timeout_style = None
+        # 引用文件绝对路径 -> 预览显示用相对路径
+        self._rel_path_cache: Dict[str, str] = {}
+        # 项目目录前缀（含末尾分隔符），项目内的引用直接去前缀得到相对路径
+        self._proj_prefix = os.path.join(os.path.normpath(project_directory), "")
+        # 上次用于生成引用预览的文本
+        self._last_feedback_text: Optional[str] = None
+        # 引用预览刷新合并器：连续输入时停顿 150ms 后才解析一次
+        self._preview_timer = QTimer(self)
+        self._preview_timer.setSingleShot(True)
+        self._preview_timer.setInterval(150)
+        self._preview_timer.timeout.connect(self._refresh_reference_preview, Qt.DirectConnection)
+        # 上次显示的剩余秒数，未跨越秒边界时跳过文本刷新
+        self._last_timeout_seconds: Optional[int] = None
 
         # 获取项目名称
         self.project_name = os.path.basename(os.path.normpath(project_directory))
         self.setWindowTitle(f"交互式反馈 - [{self.project_name}]")
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        icon_path = os.path.join(script_dir, "images", "feedback.png")
-        self.setWindowIcon(QIcon(icon_path))
+        self.setWindowIcon(_get_app_icon())
         self.setWindowFlags(self.windowFlags() | Qt.WindowStaysOnTopHint)
 
         self.settings = QSettings("InteractiveFeedbackMCP", "InteractiveFeedbackMCP")
 
-        # 加载窗口几何信息
-        self.settings.beginGroup("MainWindow_General")
-        geometry = self.settings.value("geometry")
+        # 加载窗口几何信息（只读两个键，同步读取，避免窗口显示后再跳到保存的位置）
+        geometry = self.settings.value("MainWindow_General/geometry")
         if geometry:
             self.restoreGeometry(geometry)
         else:
@@ -327,10 +714,13 @@ class FeedbackUI(QMainWindow):
             x = (screen.width() - 800) // 2
             y = (screen.height() - 600) // 2
             self.move(x, y)
-        state = self.settings.value("windowState")
+        state = self.settings.value("MainWindow_General/windowState")
         if state:
             self.restoreState(state)
-        self.settings.endGroup()
+
+        # 记录已持久化的值，关闭时未变化则跳过写入
+        self._saved_geometry = geometry
+        self._saved_state = state
 
         self._create_ui()
         set_dark_title_bar(self, True)
@@ -338,79 +728,7 @@ class FeedbackUI(QMainWindow):
 
     def _apply_styles(self):
         """应用全局样式表"""
-        style = """
-            /* 主按钮样式 */
-            QPushButton {
-                background-color: #3d3d3d;
-                border: 1px solid #555;
-                border-radius: 6px;
-                padding: 8px 16px;
-                color: #fff;
-                font-size: 13px;
-                min-height: 20px;
-            }
-            QPushButton:hover {
-                background-color: #4a4a4a;
-                border-color: #666;
-            }
-            QPushButton:pressed {
-                background-color: #2d2d2d;
-            }
-
-            /* 主要操作按钮 */
-            QPushButton#primaryButton {
-                background-color: #2a82da;
-                border: 1px solid #3a92ea;
-            }
-            QPushButton#primaryButton:hover {
-                background-color: #3a92ea;
-            }
-
-            /* 分组框样式 */
-            QGroupBox {
-                font-size: 14px;
-                font-weight: bold;
-                border: 1px solid #555;
-                border-radius: 8px;
-                margin-top: 12px;
-                padding-top: 12px;
-                background-color: #323232;
-            }
-            QGroupBox::title {
-                subcontrol-origin: margin;
-                left: 12px;
-                padding: 0 8px;
-                color: #aaa;
-            }
-
-            /* 文本编辑器样式 */
-            QTextEdit {
-                background-color: #2a2a2a;
-                border: 1px solid #555;
-                border-radius: 6px;
-                padding: 8px;
-                color: #fff;
-                font-size: 13px;
-            }
-            QTextEdit:focus {
-                border-color: #2a82da;
-            }
-
-            /* 标签样式 */
-            QLabel {
-                color: #ddd;
-                font-size: 13px;
-            }
-            QLabel#descriptionLabel {
-                font-size: 14px;
-                color: #fff;
-                padding: 8px;
-                background-color: #3a4a5a;
-                border-radius: 6px;
-                border-left: 4px solid #2a82da;
-            }
-        """
-        self.setStyleSheet(style)
+        self.setStyleSheet(_GLOBAL_QSS)
 
     def _create_ui(self):
         central_widget = QWidget()
@@ -426,14 +744,7 @@ class FeedbackUI(QMainWindow):
         project_info_layout.setSpacing(12)
 
         self.project_label = QLabel(f"📁 {self.project_name}")
-        self.project_label.setStyleSheet("""
-            font-size: 14px;
-            font-weight: bold;
-            color: #4a9eff;
-            padding: 4px 10px;
-            background-color: #2a3a4a;
-            border-radius: 4px;
-        """)
+        self.project_label.setObjectName("projectLabel")
         self.project_label.setToolTip(f"项目路径: {self.project_directory}")
         project_info_layout.addWidget(self.project_label)
 
@@ -441,49 +752,45 @@ class FeedbackUI(QMainWindow):
 
         # 超时倒计时标签
         self.timeout_label = QLabel()
-        self.timeout_label.setStyleSheet(self._TIMEOUT_STYLE_NORMAL)
+        self.timeout_label.setObjectName("timeoutLabel")
+        self.timeout_label.setProperty("state", "normal")
         project_info_layout.addWidget(self.timeout_label)
 
         # 重新计时按钮
         self.reset_timer_button = QPushButton("🔄 重新计时")
         self.reset_timer_button.setFixedWidth(90)
-        self.reset_timer_button.setStyleSheet("""
-            QPushButton {
-                font-size: 11px;
-                padding: 4px 8px;
-                background-color: #3a5a3a;
-                border: 1px solid #4a6a4a;
-                border-radius: 4px;
-                color: #cfc;
-            }
-            QPushButton:hover {
-                background-color: #4a6a4a;
-            }
-        """)
+        self.reset_timer_button.setObjectName("resetTimerButton")
         self.reset_timer_button.clicked.connect(self._reset_timeout)
         project_info_layout.addWidget(self.reset_timer_button)
 
         # 停止计时按钮
         self.stop_timer_button = QPushButton("⏹️ 停止")
         self.stop_timer_button.setFixedWidth(70)
-        self.stop_timer_button.setStyleSheet("""
-            QPushButton {
-                font-size: 11px;
-                padding: 4px 8px;
-                background-color: #5a4a3a;
-                border: 1px solid #6a5a4a;
-                border-radius: 4px;
-                color: #ffc;
-            }
-            QPushButton:hover {
-                background-color: #6a5a4a;
-            }
-        """)
+        self.stop_timer_button.setObjectName("stopTimerButton")
+        self.stop_timer_button.setProperty("mode", "running")
         self.stop_timer_button.clicked.connect(self._stop_timeout)
         project_info_layout.addWidget(self.stop_timer_button)
 
         layout.addLayout(project_info_layout)
 
+        # 倒计时标签固定宽度：每秒更新文本时不触发布局重算
+        # （加入窗口后再 polish，才能取得全局样式表中的字号）
+        # 分钟位数按实际超时时间取（至少两位，与 {minutes:02d} 一致），超过 99 分钟时也不会被截断
+        self.timeout_label.ensurePolished()
+        timeout_fm = self.timeout_label.fontMetrics()
+        minute_digits = max(2, len(str(max(self.timeout_seconds, 0) // 60)))
+        countdown_template = f"⏱️ {'0' * minute_digits}:00"
+        # danger 状态在样式表中加粗，粗体数字更宽，倒计时模板按粗体再量一次
+        bold_font = QFont(self.timeout_label.font())
+        bold_font.setBold(True)
+        text_width = max(
+            timeout_fm.horizontalAdvance(countdown_template),
+            QFontMetrics(bold_font).horizontalAdvance(countdown_template),
+            timeout_fm.horizontalAdvance("⏸️ 已暂停"),
+        )
+        # 16 = 样式表中 padding 左右各 8px；4 = 余量，emoji 回退字体的实际宽度可能略大于测量值
+        self.timeout_label.setFixedWidth(text_width + 16 + 4)
+
         # 反馈区域
         self.feedback_group = QGroupBox("💬 反馈")
         feedback_layout = QVBoxLayout(self.feedback_group)
@@ -501,52 +808,11 @@ class FeedbackUI(QMainWindow):
             options_layout = QVBoxLayout(self.options_group)
             options_layout.setSpacing(6)
 
-            # 选项按钮样式（未选中）
-            self._option_style_normal = """
-                QPushButton {
-                    text-align: left;
-                    padding: 8px 14px;
-                    background-color: #2a4a3a;
-                    border: 1px solid #3a6a4a;
-                    border-radius: 8px;
-                    color: #9fc;
-                    font-size: 13px;
-                }
-                QPushButton:hover {
-                    background-color: #3a5a4a;
-                    border-color: #4a7a5a;
-                    color: #bfe;
-                }
-                QPushButton:pressed {
-                    background-color: #1a3a2a;
-                }
-            """
-            # 选项按钮样式（已选中）
-            self._option_style_selected = """
-                QPushButton {
-                    text-align: left;
-                    padding: 8px 14px;
-                    background-color: #1a5a3a;
-                    border: 2px solid #4aaa6a;
-                    border-radius: 8px;
-                    color: #bfe;
-                    font-size: 13px;
-                    font-weight: bold;
-                }
-                QPushButton:hover {
-                    background-color: #2a6a4a;
-                    border-color: #5aba7a;
-                }
-                QPushButton:pressed {
-                    background-color: #0a4a2a;
-                }
-            """
-
             self.option_buttons = []
             for i, option in enumerate(self.options):
                 btn = QPushButton(f"  {option}")
                 btn.setToolTip(f"点击选择: {option}")
-                btn.setStyleSheet(self._option_style_normal)
+                btn.setObjectName("optionButton")
                 btn.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
                 btn.clicked.connect(lambda checked, opt=option, b=btn: self._toggle_option(opt, b))
                 options_layout.addWidget(btn)
@@ -555,10 +821,10 @@ class FeedbackUI(QMainWindow):
             feedback_layout.addWidget(self.options_group)
 
         # 反馈文本输入区
-        self.feedback_text = FeedbackTextEdit()
-        font_metrics = self.feedback_text.fontMetrics()
-        row_height = font_metrics.height()
-        padding = self.feedback_text.contentsMargins().top() + self.feedback_text.contentsMargins().bottom() + 5
+        self.feedback_text = FeedbackTextEdit(feedback_ui=self)
+        row_height = self.feedback_text.fontMetrics().height()
+        margins = self.feedback_text.contentsMargins()
+        padding = margins.top() + margins.bottom() + 5
         self.feedback_text.setMinimumHeight(5 * row_height + padding)
         self.feedback_text.setPlaceholderText(
             "✏️ 在此输入反馈内容...\n\n"
@@ -574,14 +840,7 @@ class FeedbackUI(QMainWindow):
         # 引用预览区域
         self.reference_preview = QLabel()
         self.reference_preview.setWordWrap(True)
-        self.reference_preview.setStyleSheet("""
-            font-size: 11px;
-            color: #888;
-            padding: 4px 8px;
-            background-color: #2a2a2a;
-            border-radius: 4px;
-            border-left: 3px solid #4a9eff;
-        """)
+        self.reference_preview.setObjectName("referencePreview")
         self.reference_preview.setVisible(False)
         feedback_layout.addWidget(self.reference_preview)
 
@@ -590,31 +849,22 @@ class FeedbackUI(QMainWindow):
         image_bar_layout.setSpacing(8)
 
         self.image_info_label = QLabel("")
-        self.image_info_label.setStyleSheet("font-size: 12px; color: #888;")
+        self.image_info_label.setObjectName("imageInfoLabel")
+        self.image_info_label.setProperty("active", False)
         image_bar_layout.addWidget(self.image_info_label)
 
         image_bar_layout.addStretch()
 
         select_image_btn = QPushButton("📂 选择图片")
         select_image_btn.setFixedHeight(28)
-        select_image_btn.setStyleSheet("""
-            QPushButton { font-size: 11px; padding: 2px 10px; }
-        """)
+        select_image_btn.setObjectName("selectImageButton")
         select_image_btn.clicked.connect(self._select_image_file)
         image_bar_layout.addWidget(select_image_btn)
 
         clear_image_btn = QPushButton("🗑️")
         clear_image_btn.setFixedSize(28, 28)
         clear_image_btn.setToolTip("清除所有图片")
-        clear_image_btn.setStyleSheet("""
-            QPushButton {
-                font-size: 11px;
-                padding: 2px;
-                background-color: #5a3a3a;
-                border: 1px solid #6a4a4a;
-            }
-            QPushButton:hover { background-color: #6a4a4a; }
-        """)
+        clear_image_btn.setObjectName("clearImageButton")
         clear_image_btn.clicked.connect(self._clear_images)
         image_bar_layout.addWidget(clear_image_btn)
 
@@ -622,7 +872,7 @@ class FeedbackUI(QMainWindow):
 
         # 图片提示
         self.image_hint_label = QLabel("💡 在输入框中 Ctrl+V 可直接粘贴截图，也可拖放图片文件")
-        self.image_hint_label.setStyleSheet("font-size: 11px; color: #666; padding: 2px 0;")
+        self.image_hint_label.setObjectName("imageHintLabel")
         feedback_layout.addWidget(self.image_hint_label)
 
         # 按钮布局
@@ -632,6 +882,8 @@ class FeedbackUI(QMainWindow):
         submit_button = QPushButton("✉️ 发送反馈 (Ctrl+Enter)")
         submit_button.setObjectName("primaryButton")
         submit_button.clicked.connect(self._submit_feedback)
+        # 窗口级快捷键，由 Qt 的快捷键表分发，无需逐个按键在 Python 中判断
+        QShortcut(QKeySequence("Ctrl+Return"), self, activated=self._submit_feedback)
 
         end_button = QPushButton("✓ 结束")
         end_button.clicked.connect(self._end_feedback)
@@ -648,31 +900,38 @@ class FeedbackUI(QMainWindow):
         contact_label = QLabel('💡 需要改进？联系 Fábio Ferreira <a href="https://x.com/fabiomlferreira">X.com</a> 或访问 <a href="https://dotcursorrules.com/">dotcursorrules.com</a>')
         contact_label.setOpenExternalLinks(True)
         contact_label.setAlignment(Qt.AlignCenter)
-        contact_label.setStyleSheet("font-size: 10px; color: #666; padding: 8px;")
+        contact_label.setObjectName("contactLabel")
         layout.addWidget(contact_label)
 
     def _setup_timeout_timer(self):
         """设置超时计时器"""
         self.timeout_timer = QTimer()
-        self.timeout_timer.timeout.connect(self._update_timeout_display)
+        # 计时器与槽函数均在 GUI 线程，直接连接可跳过跨线程派发判断
+        self.timeout_timer.timeout.connect(self._update_timeout_display, Qt.DirectConnection)
         self.timeout_timer.start(1000)
         self._update_timeout_display()
 
     def _update_timeout_display(self):
         """更新超时倒计时显示（仅在样式状态变化时更新样式）"""
-        elapsed = time.time() - self.start_time
+        elapsed = time.monotonic() - self.start_time
         remaining = max(0, self.timeout_seconds - elapsed)
 
-        minutes = int(remaining // 60)
-        seconds = int(remaining % 60)
-
         if remaining <= 0:
             self.timeout_timer.stop()
             self._trigger_timeout()
             return
 
-        # 只更新文本，样式仅在阈值变化时设置
-        self.timeout_label.setText(f"⏱️ {minutes:02d}:{seconds:02d}")
+        # 窗口最小化时标签不可见：不刷新界面，改为在剩余时间到期时再触发一次
+        if self.isMinimized():
+            self.timeout_timer.setInterval(int(remaining * 1000) + 1)
+            return
+
+        # 显示精度为秒，数值未变化时不重复 setText
+        remaining_seconds = int(remaining)
+        if remaining_seconds != self._last_timeout_seconds:
+            self._last_timeout_seconds = remaining_seconds
+            minutes, seconds = divmod(remaining_seconds, 60)
+            self.timeout_label.setText(f"⏱️ {minutes:02d}:{seconds:02d}")
 
         if remaining <= 60:
             target_style = "danger"
@@ -682,75 +941,57 @@ class FeedbackUI(QMainWindow):
             target_style = "normal"
 
         if self._current_timeout_style != target_style:
-            self._current_timeout_style = target_style
-            style_map = {
-                "normal": self._TIMEOUT_STYLE_NORMAL,
-                "warning": self._TIMEOUT_STYLE_WARNING,
-                "danger": self._TIMEOUT_STYLE_DANGER,
-            }
-            self.timeout_label.setStyleSheet(style_map[target_style])
+            self._set_timeout_label_state(target_style)
+
+    def _set_timeout_label_state(self, state: str):
+        """切换倒计时标签的 state 属性并重新 polish，由全局样式表中的属性选择器着色"""
+        self._current_timeout_style = state
+        self.timeout_label.setProperty("state", state)
+        self.timeout_label.style().unpolish(self.timeout_label)
+        self.timeout_label.style().polish(self.timeout_label)
+
+    def changeEvent(self, event):
+        """最小化/还原时切换计时器节奏（用户暂停时不处理）"""
+        if event.type() == QEvent.WindowStateChange:
+            timer = getattr(self, "timeout_timer", None)
+            if timer is not None and timer.isActive():
+                if not self.isMinimized():
+                    timer.setInterval(1000)
+                    self._last_timeout_seconds = None
+                self._update_timeout_display()
+        super().changeEvent(event)
 
     def _reset_timeout(self):
         """重新计时"""
-        self.start_time = time.time()
+        self.start_time = time.monotonic()
         self._current_timeout_style = None  # 重置样式缓存
+        self._last_timeout_seconds = None
         if not self.timeout_timer.isActive():
             self.timeout_timer.start(1000)
-            self.stop_timer_button.setText("⏹️ 停止")
-            self.stop_timer_button.setStyleSheet("""
-                QPushButton {
-                    font-size: 11px;
-                    padding: 4px 8px;
-                    background-color: #5a4a3a;
-                    border: 1px solid #6a5a4a;
-                    border-radius: 4px;
-                    color: #ffc;
-                }
-                QPushButton:hover {
-                    background-color: #6a5a4a;
-                }
-            """)
+            self._set_stop_button_mode("running")
         self._update_timeout_display()
 
+    def _set_stop_button_mode(self, mode: str):
+        """切换停止/恢复按钮的文本和 mode 属性，由全局样式表中的属性选择器着色"""
+        btn = self.stop_timer_button
+        btn.setText("▶️ 恢复" if mode == "paused" else "⏹️ 停止")
+        btn.setProperty("mode", mode)
+        btn.style().unpolish(btn)
+        btn.style().polish(btn)
+
     def _stop_timeout(self):
         """停止/恢复计时"""
         if self.timeout_timer.isActive():
             self.timeout_timer.stop()
             self.timeout_label.setText("⏸️ 已暂停")
-            self._current_timeout_style = "paused"
-            self.timeout_label.setStyleSheet(self._TIMEOUT_STYLE_PAUSED)
-            self.stop_timer_button.setText("▶️ 恢复")
-            self.stop_timer_button.setStyleSheet("""
-                QPushButton {
-                    font-size: 11px;
-                    padding: 4px 8px;
-                    background-color: #3a5a3a;
-                    border: 1px solid #4a6a4a;
-                    border-radius: 4px;
-                    color: #cfc;
-                }
-                QPushButton:hover {
-                    background-color: #4a6a4a;
-                }
-            """)
+            self._set_timeout_label_state("paused")
+            self._set_stop_button_mode("paused")
         else:
-            self.start_time = time.time()
+            self.start_time = time.monotonic()
             self._current_timeout_style = None
+            self._last_timeout_seconds = None
             self.timeout_timer.start(1000)
-            self.stop_timer_button.setText("⏹️ 停止")
-            self.stop_timer_button.setStyleSheet("""
-                QPushButton {
-                    font-size: 11px;
-                    padding: 4px 8px;
-                    background-color: #5a4a3a;
-                    border: 1px solid #6a5a4a;
-                    border-radius: 4px;
-                    color: #ffc;
-                }
-                QPushButton:hover {
-                    background-color: #6a5a4a;
-                }
-            """)
+            self._set_stop_button_mode("running")
             self._update_timeout_display()
 
     def _trigger_timeout(self):
@@ -765,153 +1006,294 @@ class FeedbackUI(QMainWindow):
         )
         self.close()
 
-    def _add_image_from_pixmap(self, pixmap: QPixmap, source: str):
-        """从 QPixmap 添加图片（保存临时文件并记录路径）"""
-        if pixmap.isNull():
+    def _add_image_from_qimage(self, image: QImage):
+        """从 QImage 添加图片（保存临时文件并记录路径）
+
+        带路径的本地图片文件走 _load_image_files，这里只处理粘贴/拖放的图片数据。
+        """
+        if image.isNull():
             return
 
-        # 确定图片路径
-        if source and os.path.exists(source):
-            image_path = source
+        # 同步分配路径以保持顺序，缩放和编码交给线程池
+        # 仅在需要透明通道时使用 PNG
+        if image.hasAlphaChannel():
+            ext, fmt, quality = "png", "PNG", _TEMP_PNG_QUALITY
         else:
-            # 粘贴/拖放的图片数据，保存为临时文件
-            temp_dir = tempfile.gettempdir()
-            self.temp_image_counter += 1
-            image_path = os.path.join(
-                temp_dir,
-                f"mcp_feedback_{os.getpid()}_{self.temp_image_counter}.png"
-            )
-            pixmap.save(image_path, "PNG")
+            ext, fmt, quality = "jpg", "JPG", _TEMP_JPG_QUALITY
+        temp_dir = tempfile.gettempdir()
+        image_path = os.path.join(
+            temp_dir,
+            f"mcp_feedback_{os.getpid()}_{next(self._temp_image_counter)}.{ext}"
+        )
+        self._pending_image_saves.add(image_path)
+        self._owned_temp_images.add(image_path)
+        task = _ImageSaveTask(image, image_path, fmt, quality)
+        task.signals.saved.connect(self._on_image_saved)
+        QThreadPool.globalInstance().start(task)
+
+        self._append_image_path(image_path)
+
+    def _on_image_saved(self, image_path: str, ok: bool):
+        """临时图片写入完成（主线程），写入失败时从列表中移除"""
+        self._pending_image_saves.discard(image_path)
+        if not ok:
+            self._remove_image_path(image_path)
+
+    def _remove_image_path(self, image_path: str):
+        """从图片列表中移除路径（不在列表中时忽略）"""
+        if image_path not in self._image_paths_set:
+            return
+        index = self.image_paths.index(image_path)
+        del self.image_paths[index]
+        del self._image_display_names[index]
+        self._image_paths_set.discard(image_path)
+        self._update_image_display()
+
+    def _wait_for_pending_image_saves(self):
+        """等待后台图片写入完成，并移除写入失败的路径，确保提交的图片都已落盘
+
+        写入结果的信号是排队投递的，waitForDone 返回时还未处理，所以这里直接检查文件。
+        """
+        if self._pending_image_saves:
+            QThreadPool.globalInstance().waitForDone()
+            for image_path in self._pending_image_saves:
+                if not os.path.isfile(image_path):
+                    self._remove_image_path(image_path)
+            self._pending_image_saves.clear()
+
+    def _append_image_path(self, image_path: str):
+        """记录图片路径，并在添加时预先计算显示名称"""
+        self.image_paths.append(image_path)
+        self._image_paths_set.add(image_path)
+        self._image_display_names.append(os.path.basename(image_path))
+        self._update_image_display()
 
-        # 避免重复
-        if image_path not in self.image_paths:
-            self.image_paths.append(image_path)
-            self._update_image_display()
+    def _load_image_files(self, file_paths: List[str]):
+        """在后台线程批量校验图片文件，可读的再加入图片列表"""
+        pending = [
+            p for p in dict.fromkeys(file_paths)
+            if p and p not in self._image_paths_set and p not in self._pending_image_probes
+        ]
+        if not pending:
+            return
+        self._pending_image_probes.update(dict.fromkeys(pending))
+        task = _ImageProbeTask(pending)
+        task.signals.probed.connect(self._on_image_probed)
+        QThreadPool.globalInstance().start(task)
+
+    def _on_image_probed(self, file_path: str, ok: bool):
+        """图片校验完成（主线程）"""
+        if file_path not in self._pending_image_probes:
+            return  # 提交前已同步校验过
+        del self._pending_image_probes[file_path]
+        if not ok or file_path in self._image_paths_set:
+            return
+        self._append_image_path(file_path)
+
+    def _settle_pending_image_probes(self):
+        """提交前同步校验仍在排队的图片，避免刚拖入的图片因校验未完成而丢失
+
+        canRead() 只读取文件头，数量很少，直接在主线程完成；之后到达的后台结果会被忽略。
+        """
+        for file_path in self._pending_image_probes:
+            if file_path not in self._image_paths_set and QImageReader(file_path).canRead():
+                self._append_image_path(file_path)
+        self._pending_image_probes.clear()
 
     def _select_image_file(self):
         """通过文件对话框选择图片"""
         initial_dir = self.project_directory
-        if self.current_file and os.path.exists(self.current_file):
-            if os.path.isfile(self.current_file):
-                initial_dir = os.path.dirname(self.current_file)
-            else:
-                initial_dir = self.current_file
+        if self.current_file:
+            # 单次 stat 同时判断存在性与类型
+            try:
+                st = os.stat(self.current_file)
+            except OSError:
+                st = None
+            if st is not None:
+                if stat.S_ISDIR(st.st_mode):
+                    initial_dir = self.current_file
+                else:
+                    initial_dir = os.path.dirname(self.current_file)
 
-        files, _ = QFileDialog.getOpenFileNames(
+        # 非阻塞对话框：目录枚举期间事件循环保持运行
+        dialog = QFileDialog(
             self,
             "选择图片（可多选）",
             initial_dir,
             "图片文件 (*.png *.jpg *.jpeg *.gif *.bmp *.webp);;所有文件 (*.*)"
         )
-        for file_path in files:
-            if file_path and file_path not in self.image_paths:
-                pixmap = QPixmap(file_path)
-                if not pixmap.isNull():
-                    self.image_paths.append(file_path)
-        if files:
-            self._update_image_display()
+        dialog.setFileMode(QFileDialog.FileMode.ExistingFiles)
+        dialog.setAttribute(Qt.WA_DeleteOnClose)
+        dialog.filesSelected.connect(self._on_image_files_selected)
+        dialog.open()
+
+    def _on_image_files_selected(self, files: List[str]):
+        """文件对话框选择完成"""
+        self._load_image_files(files)
 
     def _clear_images(self):
-        """清除所有图片"""
+        """清除所有图片（包括仍在后台校验、尚未加入列表的图片）"""
+        self._pending_image_probes.clear()
         self.image_paths.clear()
-        self.temp_image_counter = 0
+        self._image_paths_set.clear()
+        self._image_display_names.clear()
         self._update_image_display()
 
     def _update_image_display(self):
+        """请求刷新图片状态显示（合并到下一帧执行）"""
+        if not self._image_display_timer.isActive():
+            self._image_display_timer.start()
+
+    def _do_update_image_display(self):
         """更新图片状态显示"""
         count = len(self.image_paths)
         if count > 0:
-            names = [os.path.basename(p) for p in self.image_paths]
-            self.image_info_label.setText(f"🖼️ 已添加 {count} 张图片: {', '.join(names)}")
-            self.image_info_label.setStyleSheet("font-size: 12px; color: #4a9eff;")
+            self.image_info_label.setText(f"🖼️ 已添加 {count} 张图片: {', '.join(self._image_display_names)}")
+            self._set_image_info_active(True)
             self.image_hint_label.setVisible(False)
         else:
             self.image_info_label.setText("")
-            self.image_info_label.setStyleSheet("font-size: 12px; color: #888;")
+            self._set_image_info_active(False)
             self.image_hint_label.setVisible(True)
 
+    def _set_image_info_active(self, active: bool):
+        """切换图片状态标签的 active 属性，仅在状态变化时重新 polish"""
+        label = self.image_info_label
+        if label.property("active") == active:
+            return
+        label.setProperty("active", active)
+        label.style().unpolish(label)
+        label.style().polish(label)
+
     def _toggle_option(self, option: str, btn: QPushButton):
         """切换选项的选中状态（追加/移除，不覆盖输入框内容）"""
         if option in self.selected_options:
             # 取消选中
             self.selected_options.remove(option)
-            btn.setStyleSheet(self._option_style_normal)
+            btn.setProperty("selected", False)
             btn.setText(f"  {option}")
         else:
             # 选中
             self.selected_options.append(option)
-            btn.setStyleSheet(self._option_style_selected)
+            btn.setProperty("selected", True)
             btn.setText(f"✔ {option}")
+        # 动态属性变化后需重新 polish 才能应用属性选择器
+        btn.style().unpolish(btn)
+        btn.style().polish(btn)
 
     def _on_feedback_text_changed(self):
-        """反馈文本变化时，更新引用预览"""
+        """反馈文本变化时，延迟刷新引用预览"""
+        self._preview_timer.start()
+
+    def _refresh_reference_preview(self):
+        """更新引用预览"""
         feedback_text = self.feedback_text.toPlainText()
+        if feedback_text == self._last_feedback_text:
+            return
+        self._last_feedback_text = feedback_text
+        if '@' not in feedback_text:
+            self.reference_preview.setVisible(False)
+            return
         references = parse_file_references(feedback_text, self.project_directory)
 
         if references:
-            preview_lines = []
-            for file_path, start_line, end_line in references:
+            get_rel = self._get_rel_display
+            preview_text = "检测到引用: " + ", ".join([
+                f"📄 {get_rel(file_path)}" if start_line is None
+                else f"📄 {get_rel(file_path)}#{start_line}" if end_line == start_line
+                else f"📄 {get_rel(file_path)}#{start_line}-{end_line}"
+                for file_path, start_line, end_line in references
+            ])
+            self.reference_preview.setText(preview_text)
+            self.reference_preview.setVisible(True)
+        else:
+            self.reference_preview.setVisible(False)
+
+    def _get_rel_display(self, file_path: str) -> str:
+        """引用文件相对项目目录的显示路径（按绝对路径缓存）"""
+        rel_path = self._rel_path_cache.get(file_path)
+        if rel_path is None:
+            if file_path.startswith(self._proj_prefix):
+                # 常见情况：引用位于项目内，去掉前缀即可，省去 relpath 的 abspath 和拆分
+                rel_path = _to_posix(file_path[len(self._proj_prefix):])
+            else:
                 try:
-                    rel_path = os.path.relpath(file_path, self.project_directory).replace('\\', '/')
+                    rel_path = _to_posix(os.path.relpath(file_path, self.project_directory))
                 except ValueError:
                     rel_path = os.path.basename(file_path)
+            self._rel_path_cache[file_path] = rel_path
+        return rel_path
 
-                if start_line is None:
-                    preview_lines.append(f"📄 {rel_path}")
-                elif end_line == start_line:
-                    preview_lines.append(f"📄 {rel_path}#{start_line}")
-                else:
-                    preview_lines.append(f"📄 {rel_path}#{start_line}-{end_line}")
+    def _submit_feedback(self, *, override_text: Optional[str] = None):
+        """提交反馈
 
-            preview_text = "检测到引用: " + ", ".join(preview_lines)
-            self.reference_preview.setText(preview_text)
-            self.reference_preview.setVisible(True)
-        else:
-            self.reference_preview.setVisible(False)
+        参数:
+            override_text: 直接使用的反馈文本，不读取输入框（仅关键字参数，
+                避免 clicked(bool) 信号把 checked 传进来）
+        """
+        self._wait_for_pending_image_saves()
+        self._settle_pending_image_probes()
 
-    def _submit_feedback(self):
-        """提交反馈"""
-        feedback_text = self.feedback_text.toPlainText().strip()
+        if override_text is not None:
+            feedback_text = override_text
+        else:
+            feedback_text = self.feedback_text.toPlainText().strip()
 
-        # 展开文件引用
-        expanded_text = expand_file_references(feedback_text, self.project_directory)
+        # 展开文件引用（只做带缓存的存在性检查，同步完成）；没有 @ 时不可能有引用，直接跳过
+        if '@' in feedback_text:
+            expanded_text = expand_file_references(feedback_text, self.project_directory)
+        else:
+            expanded_text = feedback_text
 
-        # 如果有选中的选项，追加到反馈中
+        # 按 选项 / 正文 / 图片 的顺序收集各段，最后一次性拼接
+        parts = []
         if self.selected_options:
-            options_info = "\n".join([f"  - {opt}" for opt in self.selected_options])
-            if expanded_text:
-                expanded_text = f"[选择的方案:]\n{options_info}\n\n{expanded_text}"
-            else:
-                expanded_text = f"[选择的方案:]\n{options_info}"
-
-        # 如果有图片，追加图片路径信息
+            parts.append("[选择的方案:]\n" + "\n".join([f"  - {opt}" for opt in self.selected_options]))
+        if expanded_text:
+            parts.append(expanded_text)
         if self.image_paths:
-            images_info = "\n".join([f"  - {p}" for p in self.image_paths])
-            if expanded_text:
-                expanded_text += f"\n\n[附加图片 ({len(self.image_paths)}张):]\n{images_info}"
-            else:
-                expanded_text = f"[附加图片 ({len(self.image_paths)}张):]\n{images_info}"
+            parts.append(
+                f"[附加图片 ({len(self.image_paths)}张):]\n"
+                + "\n".join([f"  - {p}" for p in self.image_paths])
+            )
+        expanded_text = "\n\n".join(parts)
 
         self.feedback_result = FeedbackResult(
             logs="",
             interactive_feedback=expanded_text,
-            image_paths=self.image_paths.copy(),
-            selected_options=self.selected_options.copy(),
+            image_paths=self.image_paths,
+            selected_options=self.selected_options,
             timeout_triggered=False,
         )
+        # 列表所有权直接转交给结果，窗口随即关闭，无需复制；
+        # 与 image_paths 配套的索引和显示名称一并重置，保持三者一致
+        self.image_paths = []
+        self._image_paths_set = set()
+        self._image_display_names = []
+        self.selected_options = []
+        # 已提交的图片交由调用方读取，不再随本会话清理
+        self._owned_temp_images.difference_update(self.feedback_result["image_paths"])
         self.close()
 
     def _end_feedback(self):
         """结束反馈，清理所有临时图片"""
+        owned_before = set(self._owned_temp_images)
         self._cleanup_temp_images(keep_none=True)
-        self.feedback_text.setPlainText("结束")
-        self._submit_feedback()
+        # 已删除的临时图片不再出现在提交结果中
+        for image_path in owned_before - self._owned_temp_images:
+            self._remove_image_path(image_path)
+        # 历史会话遗留的图片在进程退出时统一扫描一次，不阻塞提交
+        _schedule_orphan_sweep()
+        self._submit_feedback(override_text="结束")
 
     def closeEvent(self, event):
-        self.settings.beginGroup("MainWindow_General")
-        self.settings.setValue("geometry", self.saveGeometry())
-        self.settings.setValue("windowState", self.saveState())
-        self.settings.endGroup()
+        geometry = self.saveGeometry()
+        state = self.saveState()
+        if geometry != self._saved_geometry or state != self._saved_state:
+            self.settings.setValue("MainWindow_General/geometry", geometry)
+            self.settings.setValue("MainWindow_General/windowState", state)
+            self._saved_geometry = geometry
+            self._saved_state = state
         super().closeEvent(event)
 
     def _cleanup_temp_images(self, keep_none: bool = False):
@@ -920,25 +1302,15 @@ class FeedbackUI(QMainWindow):
         参数:
             keep_none: 为 True 时清除所有临时图片，为 False 时保留提交中引用的
         """
-        temp_dir = tempfile.gettempdir()
+        self._wait_for_pending_image_saves()
 
         # 确定需要保留的路径
-        keep_paths = set()
+        keep_paths = frozenset()
         if not keep_none and self.feedback_result and self.feedback_result.get("image_paths"):
-            keep_paths = set(self.feedback_result["image_paths"])
+            keep_paths = frozenset(self.feedback_result["image_paths"])
 
-        # 清除所有 mcp_feedback_ 临时图片（包括历史会话的）
-        try:
-            for filename in os.listdir(temp_dir):
-                if filename.startswith("mcp_feedback_") and filename.endswith(".png"):
-                    full_path = os.path.join(temp_dir, filename)
-                    if full_path not in keep_paths:
-                        try:
-                            os.remove(full_path)
-                        except OSError:
-                            pass
-        except OSError:
-            pass
+        # 只删除本会话创建的临时图片，无需遍历整个临时目录
+        _remove_temp_images(self._owned_temp_images, keep_paths)
 
     def run(self) -> FeedbackResult:
         self.show()
@@ -956,9 +1328,18 @@ class FeedbackUI(QMainWindow):
         return self.feedback_result
 
 
+# QApplication 的调色板和样式是否已设置
+_app_initialized = False
+
+
+@functools.lru_cache(maxsize=128)
 def get_project_settings_group(project_dir: str) -> str:
+    # hashlib 会加载 OpenSSL 扩展，只在实际用到时再导入，不拖慢启动
+    import hashlib
+
     basename = os.path.basename(os.path.normpath(project_dir))
-    full_hash = hashlib.md5(project_dir.encode('utf-8')).hexdigest()[:8]
+    normalized = os.path.normcase(os.path.abspath(project_dir))
+    full_hash = hashlib.blake2s(normalized.encode('utf-8'), digest_size=4).hexdigest()
     return f"{basename}_{full_hash}"
 
 
@@ -973,16 +1354,28 @@ def feedback_ui(project_directory: str, prompt: str, output_file: Optional[str]
         timeout_seconds: 超时时间（秒）
         options: 可选的解决方案列表
     """
-    app = QApplication.instance() or QApplication()
-    app.setPalette(get_dark_mode_palette(app))
-    app.setStyle("Fusion")
+    global _app_initialized
+    app = QApplication.instance()
+    if app is None:
+        # 应用级属性必须在创建 QApplication 之前设置
+        QApplication.setAttribute(Qt.AA_ShareOpenGLContexts)
+        app = QApplication(sys.argv)
+    # 同一进程内多次弹出界面时，调色板和样式只需设置一次
+    if not _app_initialized:
+        app.setPalette(get_dark_mode_palette(app))
+        app.setStyle("Fusion")
+        _app_initialized = True
     ui = FeedbackUI(project_directory, prompt, current_file, timeout_seconds, options)
     result = ui.run()
 
     if output_file and result:
-        os.makedirs(os.path.dirname(output_file) if os.path.dirname(output_file) else ".", exist_ok=True)
-        with open(output_file, "w") as f:
-            json.dump(result, f)
+        output_dir = os.path.dirname(output_file)
+        if output_dir and not os.path.isdir(output_dir):
+            os.makedirs(output_dir, exist_ok=True)
+        # 先整体序列化再一次性写入二进制文件，避免 json.dump 分块写入文本流
+        data = json.dumps(result, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        with open(output_file, "wb") as f:
+            f.write(data)
         return None
 
     return result
@@ -74,7 +74,7 @@ def launch_feedback_ui(project_directory: str, summary: str, current_file: Optio
             raise Exception(f"Failed to launch feedback UI (exit code {result.returncode}): {error_msg}")
 
         # Read the result from the temporary file
-        with open(output_file, 'r') as f:
+        with open(output_file, 'r', encoding='utf-8') as f:
             result = json.load(f)
         os.unlink(output_file)
         return result